@@ -5,12 +5,29 @@ export CUSTOM_AWS_ACCESS_KEY_ID=$(grep CUSTOM_AWS_ACCESS_KEY_ID .env | cut -d '=
 export CUSTOM_AWS_SECRET_ACCESS_KEY=$(grep CUSTOM_AWS_SECRET_ACCESS_KEY .env | cut -d '=' -f2)
 export CUSTOM_AWS_REGION_NAME=$(grep CUSTOM_AWS_REGION_NAME .env | cut -d '=' -f2)
 
+# Stop the remaining services when this script exits, and exit when interrupted
+trap 'kill $(jobs -p) 2>/dev/null' EXIT
+trap 'exit 130' INT
+trap 'exit 143' TERM
+
 # Start litellm server
 echo "Starting litellm server..."
 nohup poetry run litellm --config litellm.config.yaml > nohup.litellm.out 2>&1 &
 
-# Wait for litellm to start (adjust sleep time if needed)
-sleep 15
+# Wait for litellm to report liveness instead of sleeping a fixed amount
+LITELLM_HEALTH_URL=${LITELLM_HEALTH_URL:-http://0.0.0.0:4000/health/liveliness}
+LITELLM_UP=0
+for _ in $(seq 1 30); do
+    if curl -sf "$LITELLM_HEALTH_URL" > /dev/null 2>&1; then
+        echo "litellm server is up"
+        LITELLM_UP=1
+        break
+    fi
+    sleep 1
+done
+if [ "$LITELLM_UP" -ne 1 ]; then
+    echo "Warning: litellm server did not report liveness after 30 seconds, see nohup.litellm.out" >&2
+fi
 
 # Start market scan process
 echo "Starting market scan process..."
@@ -23,4 +40,10 @@ nohup poetry run python -m src.solve_instances_process > nohup.solve_instances.o
 echo "All services started. Check the following log files:"
 echo "- nohup.litellm.out for LiteLLM logs"
 echo "- nohup.market_scan.out for market scanning logs"
-echo "- nohup.solve_instances.out for instance solving logs" 
\ No newline at end of file
+echo "- nohup.solve_instances.out for instance solving logs"
+
+# Block until one of the services exits and propagate its exit code
+wait -n
+STATUS=$?
+echo "A service exited with status $STATUS, stopping"
+exit $STATUS
@@ -1,9 +1,12 @@
+from ._common import CONTAINER_GID, CONTAINER_UID
 from .aider import get_container_kwargs as aider_get_container_kwargs
 from .aider import suggest_test_command as aider_suggest_test_command
 from .open_hands import get_container_kwargs as open_hands_get_container_kwargs
 from .raaid import get_container_kwargs as raaid_get_container_kwargs
 
 __all__ = [
+    "CONTAINER_GID",
+    "CONTAINER_UID",
     "aider_get_container_kwargs",
     "aider_suggest_test_command",
     "open_hands_get_container_kwargs",
@@ -0,0 +1,49 @@
+import os
+
+# Loading the settings puts .env and any AWS secrets in os.environ before the snapshot below.
+import src.config  # noqa: F401
+
+CONTAINER_ENV_ALLOWLIST = frozenset(
+    {
+        "ANTHROPIC_API_KEY",
+        "DEEPSEEK_API_KEY",
+        "GEMINI_API_KEY",
+        "OPENAI_API_BASE",
+        "OPENAI_API_KEY",
+        "OPENAI_BASE_URL",
+        "OPENROUTER_API_KEY",
+    }
+)
+CONTAINER_ENV_PREFIXES = ("AIDER_", "AWS_", "EXPERT_")
+CONTAINER_HOME = "/home/ubuntu"
+# Agent containers run as the current user, so mounted files stay ours.
+CONTAINER_UID = os.getuid()
+CONTAINER_GID = os.getgid()
+AGENT_CACHE_DIR = "/tmp/aider_cache"
+AGENT_CACHE_VOLUME = {AGENT_CACHE_DIR: {"bind": CONTAINER_HOME, "mode": "rw"}}
+DOCKER_HOST_GATEWAY = {"host.docker.internal": "host-gateway"}
+# Containers run without a TTY, so ask the tools for plain, uncolored output.
+NON_INTERACTIVE_ENV = {"NO_COLOR": "1", "TERM": "dumb"}
+
+# The host environment is fixed once settings have loaded .env and any AWS secrets,
+# so the forwarded subset is computed once instead of on every container launch.
+_CONTAINER_ENV = {
+    key: value
+    for key, value in os.environ.items()
+    if key in CONTAINER_ENV_ALLOWLIST or key.startswith(CONTAINER_ENV_PREFIXES)
+}
+_CONTAINER_ENV.update(NON_INTERACTIVE_ENV, HOME=CONTAINER_HOME)
+
+
+def get_container_environment() -> dict[str, str]:
+    """Return the host variables forwarded to agent containers.
+
+    Only model provider credentials and agent configuration are forwarded, not the
+    whole host environment. HOME points at the mounted agent cache directory.
+    """
+    return dict(_CONTAINER_ENV)
+
+
+def get_container_user() -> str:
+    """Return the "uid:gid" the agent containers run as."""
+    return f"{CONTAINER_UID}:{CONTAINER_GID}"
@@ -1,4 +1,5 @@
 import base64
+import functools
 import os
 import shlex
 
@@ -8,9 +9,23 @@ from loguru import logger
 
 from src.config import SETTINGS
 
+from ._common import AGENT_CACHE_VOLUME, get_container_environment, get_container_user
+
 load_dotenv()
 openai.api_key = SETTINGS.openai_api_key
 WEAK_MODEL = "gpt-4o-mini"
+TEST_COMMAND_CACHE_SIZE = 64
+
+_AIDER_COMMAND_TEMPLATE = (
+    "source /venv/bin/activate && "
+    "python aider_modify_repo.py --editor-model-name {model_name} "
+    "--solver-command-base64 {solver_command} "
+    "--architect-model-name {architect_model_name}{test_args_and_command}"
+)
+_STATIC_CONTAINER_KWARGS = {
+    "image": "aider-boto3",
+    "user": get_container_user(),
+}
 
 
 def _get_readme_content(repo_path: str) -> str:
@@ -34,6 +49,36 @@ def _get_readme_content(repo_path: str) -> str:
     return ""
 
 
+@functools.lru_cache(maxsize=TEST_COMMAND_CACHE_SIZE)
+def _generate_test_command(readme_content: str) -> str:
+    # Failed calls raise instead of returning, so only real answers are cached.
+    response = openai.chat.completions.create(
+        model=WEAK_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are an assistant that provides Shell commands to run tests "
+                    "based on project documentation. You don't format your answer and "
+                    "provide raw text."
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    "Based on the following README content, "
+                    "provide a single shell command necessary to run the project tests. "
+                    "Make sure to output a single command. Example: `make tests`."
+                    "If the content doesn't specify how to run tests, do not output anything:"
+                    "\n\n"
+                    f"{readme_content}"
+                ),
+            },
+        ],
+    )
+    return response.choices[0].message.content.strip()
+
+
 def suggest_test_command(repo_path: str) -> str:
     logger.info(f"Starting test command suggestion process for repo: {repo_path}")
     readme_content = _get_readme_content(repo_path)
@@ -44,31 +89,7 @@ def suggest_test_command(repo_path: str) -> str:
 
     logger.info("Requesting OpenAI to generate a test command based on README content.")
     try:
-        response = openai.chat.completions.create(
-            model=WEAK_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an assistant that provides Shell commands to run tests "
-                        "based on project documentation. You don't format your answer and "
-                        "provide raw text."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        "Based on the following README content, "
-                        "provide a single shell command necessary to run the project tests. "
-                        "Make sure to output a single command. Example: `make tests`."
-                        "If the content doesn't specify how to run tests, do not output anything:"
-                        "\n\n"
-                        f"{readme_content}"
-                    ),
-                },
-            ],
-        )
-        command = response.choices[0].message.content.strip()
+        command = _generate_test_command(readme_content)
         if command:
             logger.info(f"Test command successfully generated: {command}")
             return command
@@ -93,26 +114,20 @@ def get_container_kwargs(
     entrypoint = [
         "/bin/bash",
         "-c",
-        (
-            "source /venv/bin/activate && "
-            f"python aider_modify_repo.py --editor-model-name {shlex.quote(model_name)} "
-            f"--solver-command-base64 {encoded_solver_command} "
-            f"--architect-model-name {shlex.quote(architect_model_name or '')} "
-            f"{test_args_and_command}"
-        ).strip(),
+        _AIDER_COMMAND_TEMPLATE.format(
+            model_name=shlex.quote(model_name),
+            solver_command=encoded_solver_command,
+            architect_model_name=shlex.quote(architect_model_name or ""),
+            test_args_and_command=test_args_and_command,
+        ),
     ]
     logger.info(f"Entrypoint: {entrypoint}")
-    env_vars = {key: os.getenv(key) for key in os.environ.keys()}
-    volumes = {
-        repo_directory: {"bind": "/app", "mode": "rw"},
-        "/tmp/aider_cache": {"bind": "/home/ubuntu", "mode": "rw"},
-    }
-    user = f"{os.getuid()}:{os.getgid()}"
+    env_vars = get_container_environment()
+    volumes = {repo_directory: {"bind": "/app", "mode": "rw"}, **AGENT_CACHE_VOLUME}
     kwargs = {
-        "image": "paulgauthier/aider",
+        **_STATIC_CONTAINER_KWARGS,
         "entrypoint": entrypoint,
         "environment": env_vars,
-        "user": user,
         "volumes": volumes,
     }
     return kwargs
@@ -1,6 +1,5 @@
 import argparse
 import base64
-import os
 
 from aider.coders import Coder
 from aider.io import InputOutput
@@ -40,7 +39,6 @@ def modify_repo_with_aider(
 
 
 def main():
-    os.system("pip3 install boto3")
     parser = argparse.ArgumentParser(description="Modify a repository with Aider.")
     parser.add_argument(
         "--editor-model-name", type=str, required=True, help="The name of the model to use."
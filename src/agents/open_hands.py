@@ -1,11 +1,12 @@
 import os
-from datetime import datetime
 
 from dotenv import load_dotenv
 
 from src.config import SETTINGS
 from src.enums import ModelName, ProviderType
 
+from ._common import NON_INTERACTIVE_ENV
+
 load_dotenv()
 
 
@@ -21,6 +22,14 @@ _MODEL_ALIAS_TO_MODEL: dict[ModelName, dict[ProviderType, str]] = {
 _DOCKER_IMAGE = "docker.all-hands.dev/all-hands-ai/openhands:0.18"
 _RUNTIME_IMAGE = "docker.all-hands.dev/all-hands-ai/runtime:0.18-nikolaik"
 _DOCKER_NETWORK_HOST = ["host.docker.internal:host-gateway"]
+_STATIC_VOLUMES = {
+    "/var/run/docker.sock": {"bind": "/var/run/docker.sock", "mode": "rw"},
+    os.path.expanduser("~/.openhands-state"): {"bind": "/.openhands-state", "mode": "rw"},
+}
+_STATIC_CONTAINER_KWARGS = {
+    "image": _DOCKER_IMAGE,
+    "extra_hosts": _DOCKER_NETWORK_HOST,
+}
 _PROVIDER_CONFIGS: dict[ProviderType, dict[str, str]] = {
     ProviderType.LITELLM: {
         "LLM_BASE_URL": SETTINGS.litellm_docker_internal_api_base,
@@ -30,6 +39,18 @@ _PROVIDER_CONFIGS: dict[ProviderType, dict[str, str]] = {
         "OPENAI_API_KEY": SETTINGS.openai_api_key,
     },
 }
+_BASE_ENV: dict[str, str] = {
+    "SANDBOX_RUNTIME_CONTAINER_IMAGE": _RUNTIME_IMAGE,
+    "SANDBOX_USER_ID": str(os.getuid()),
+    "GITHUB_TOKEN": SETTINGS.github_pat,
+    "GITHUB_USERNAME": SETTINGS.github_username,
+    "GITHUB_EMAIL": SETTINGS.github_email,
+    "LOG_ALL_EVENTS": "true",
+    "GIT_ASKPASS": "echo",
+    "GIT_TERMINAL_PROMPT": "0",
+    **_PROVIDER_CONFIGS[SETTINGS.provider],
+    **NON_INTERACTIVE_ENV,
+}
 
 
 def get_container_kwargs(
@@ -44,32 +65,17 @@ def get_container_kwargs(
         "ALWAYS STAY IN THE SAME REPOSITORY BRANCH."
     )
     entrypoint = ["python", "-m", "openhands.core.main", "-t", solver_command]
-    env_vars = {
-        "SANDBOX_RUNTIME_CONTAINER_IMAGE": _RUNTIME_IMAGE,
-        "SANDBOX_USER_ID": str(os.getuid()),
-        "GITHUB_TOKEN": SETTINGS.github_pat,
-        "GITHUB_USERNAME": SETTINGS.github_username,
-        "GITHUB_EMAIL": SETTINGS.github_email,
+    env_vars = _BASE_ENV | {
         "WORKSPACE_MOUNT_PATH": repo_directory,
         "LLM_MODEL": _MODEL_ALIAS_TO_MODEL[model_name][SETTINGS.provider],
-        "LOG_ALL_EVENTS": "true",
-        "GIT_ASKPASS": "echo",
-        "GIT_TERMINAL_PROMPT": "0",
-    }
-    for key, value in _PROVIDER_CONFIGS[SETTINGS.provider].items():
-        env_vars[key] = value
-    volumes = {
-        repo_directory: {"bind": "/opt/workspace_base", "mode": "rw"},
-        "/var/run/docker.sock": {"bind": "/var/run/docker.sock", "mode": "rw"},
-        os.path.expanduser("~/.openhands-state"): {"bind": "/.openhands-state", "mode": "rw"},
     }
-    container_name = f"openhands-app-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    volumes = {repo_directory: {"bind": "/opt/workspace_base", "mode": "rw"}, **_STATIC_VOLUMES}
+    container_name = f"openhands-app-{os.urandom(6).hex()}"
     kwargs = {
-        "image": _DOCKER_IMAGE,
+        **_STATIC_CONTAINER_KWARGS,
         "entrypoint": entrypoint,
         "environment": env_vars,
         "volumes": volumes,
         "name": container_name,
-        "extra_hosts": _DOCKER_NETWORK_HOST,
     }
     return kwargs
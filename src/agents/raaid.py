@@ -1,8 +1,27 @@
-import os
+import shlex
 from typing import Any, Dict
 
 from src.enums import ModelName
 
+from ._common import (
+    AGENT_CACHE_VOLUME,
+    DOCKER_HOST_GATEWAY,
+    get_container_environment,
+    get_container_user,
+)
+
+_RAAID_COMMAND_TEMPLATE = (
+    "source /venv/bin/activate && ra-aid -m {solver_command} "
+    "--provider openrouter --model google/gemini-2.0-flash-001 "
+    "--expert-provider openrouter --expert-model openai/o3-mini-high "
+    "--cowboy-mode"
+)
+_STATIC_CONTAINER_KWARGS = {
+    "image": "aider-raaid",
+    "user": get_container_user(),
+    "extra_hosts": DOCKER_HOST_GATEWAY,
+}
+
 
 def get_container_kwargs(
     repo_directory: str,
@@ -11,30 +30,19 @@ def get_container_kwargs(
     model_provider: str = "openai",
     expert_provider: str = "openai",
 ) -> Dict[str, Any]:
-    escaped_solver_command = solver_command.replace('"', '\\"')
+    escaped_solver_command = shlex.quote(solver_command)
     entrypoint = [
         "/bin/bash",
         "-c",
-        (
-            f'source /venv/bin/activate && ra-aid -m "{escaped_solver_command}" '
-            f"--provider openrouter --model google/gemini-2.0-flash-001 "
-            f"--expert-provider openrouter --expert-model openai/o3-mini-high "
-            f"--cowboy-mode"
-        ).strip(),
+        _RAAID_COMMAND_TEMPLATE.format(solver_command=escaped_solver_command),
     ]
 
-    volumes = {
-        f"{repo_directory}/.": {"bind": "/app", "mode": "rw"},
-        "/tmp/aider_cache": {"bind": "/home/ubuntu", "mode": "rw"},
-    }
-    env_vars = {key: os.getenv(key) for key in os.environ.keys()}
-    user = f"{os.getuid()}:{os.getgid()}"
+    volumes = {f"{repo_directory}/.": {"bind": "/app", "mode": "rw"}, **AGENT_CACHE_VOLUME}
+    env_vars = get_container_environment()
     kwargs = {
-        "image": "aider-raaid",
+        **_STATIC_CONTAINER_KWARGS,
         "entrypoint": entrypoint,
         "environment": env_vars,
         "volumes": volumes,
-        "user": user,
-        "extra_hosts": {"host.docker.internal": "host-gateway"},
     }
     return kwargs
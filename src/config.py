@@ -1,15 +1,30 @@
+import functools
+import json
 import os
 
 from dotenv import load_dotenv
 from pydantic import Field, model_validator
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from src.enums import AgentType, ModelName, ProviderType
 
 load_dotenv()
 
+_LOADED_SECRET_ARNS: set[str] = set()
+
+
+@functools.lru_cache(maxsize=4)
+def _fetch_secret_cached(secret_arn: str) -> dict[str, str]:
+    import boto3
+
+    client = boto3.client("secretsmanager")
+    response = client.get_secret_value(SecretId=secret_arn)
+    return json.loads(response["SecretString"])
+
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(case_sensitive=False, frozen=True)
+
     foundation_model_name: ModelName | None = Field(
         None, description="The name of the model to use."
     )
@@ -36,6 +51,21 @@ class Settings(BaseSettings):
     )
 
     max_bid: float = Field(0.01, gt=0, description="The maximum bid for a proposal.")
+    log_file: str | None = Field(
+        None, description="Optional file the processes also append their logs to."
+    )
+    thread_pool_size: int = Field(
+        8, gt=0, description="The number of worker threads for blocking work in the processes."
+    )
+    max_concurrent_solves: int = Field(
+        4, gt=0, description="The maximum number of instances solved at the same time."
+    )
+    scratch_dir: str | None = Field(
+        None, description="Optional directory, e.g. a RAM backed one, to clone repositories in."
+    )
+    git_clone_filter: str | None = Field(
+        "blob:none", description="Partial clone filter for repositories, or None for full clones."
+    )
     agent_type: AgentType = Field(..., description="The type of agent to use.")
 
     openai_api_base: str | None = Field(None, description="The base URL for the OpenAI API.")
@@ -51,9 +81,6 @@ class Settings(BaseSettings):
         "http://0.0.0.0:4000", description="The local API base for LiteLLM"
     )
 
-    class Config:
-        case_sensitive = False
-
     @model_validator(mode="after")
     def validate_model(self) -> "Settings":
         if self.agent_type != AgentType.raaid:
@@ -74,6 +101,10 @@ class Settings(BaseSettings):
 
         return self
 
+    @staticmethod
+    def fetch_secret(secret_arn: str) -> dict[str, str]:
+        return _fetch_secret_cached(secret_arn)
+
     @classmethod
     def load_settings(cls) -> "Settings":
         aws_execution_env = os.getenv("AWS_EXECUTION_ENV")
@@ -82,8 +113,9 @@ class Settings(BaseSettings):
             if not secret_arn:
                 raise ValueError("AWS_SECRET_ARN environment variable is not set.")
 
-            secret_data = cls.fetch_secret(secret_arn)
-            os.environ.update(secret_data)
+            if secret_arn not in _LOADED_SECRET_ARNS:
+                os.environ.update(cls.fetch_secret(secret_arn))
+                _LOADED_SECRET_ARNS.add(secret_arn)
 
         return cls()
 
@@ -1,4 +1,6 @@
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import openai
 from docker import from_env as docker_from_env
@@ -7,15 +9,27 @@ from requests.exceptions import ReadTimeout
 
 from src.config import SETTINGS
 
-openai.api_key = SETTINGS.openai_api_key
+_OPENAI_CLIENT = openai.OpenAI(api_key=SETTINGS.openai_api_key)
 WEAK_MODEL = "gpt-4o-mini"
-
-
-def _clean_logs(logs: str) -> str:
-    anti_escape_logs = re.compile(r"\x1B[@-_][0-?]*[ -/]*[@-~]")
-    logs = anti_escape_logs.sub("", logs).split("Tokens:")[0]
-
-    prompt = """
+ANSI_ESCAPE_RE = re.compile(rb"\x1B[@-_][0-?]*[ -/]*[@-~]")
+LOG_TAIL_LINES = 2000
+LOG_CHAR_BUDGET = 64 * 1024
+LOG_BYTE_BUDGET = 4 * LOG_CHAR_BUDGET
+LOG_END_MARKER = b"Tokens:"
+LOG_SUMMARY_MIN_CHARS = 512
+CLEANUP_MAX_WORKERS = 8
+
+# Agent containers currently being waited on, so a shutdown can stop them early. Once
+# stopping, no new containers are launched.
+_running_containers: set = set()
+_running_containers_lock = threading.Lock()
+_stopping = False
+
+_LOG_SUMMARY_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful assistant that processes technical logs.",
+}
+_LOG_SUMMARY_PROMPT = """
     Below are the raw logs from an AI coding assistant. Please rewrite these logs as a clear, 
     concise message to a user, focusing on the important actions and changes made. Remove any 
     technical artifacts, ANSI escape codes, and redundant information. Format the response 
@@ -25,65 +39,149 @@ def _clean_logs(logs: str) -> str:
     {logs}
     """
 
+
+def _scrub_logs(raw_logs: bytes) -> str:
+    # Work on the raw bytes and only decode the part that is kept.
+    logs = ANSI_ESCAPE_RE.sub(b"", raw_logs).partition(LOG_END_MARKER)[0]
+    return logs.decode("utf-8", "replace")[-LOG_CHAR_BUDGET:]
+
+
+def _read_logs_until_marker(container) -> bytes:
+    """Stream the container logs, stopping at the first token usage line."""
+    buffer = bytearray()
+    stream = container.logs(stream=True, follow=False)
     try:
-        response = openai.chat.completions.create(
-            model=WEAK_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that processes technical logs.",
-                },
-                {"role": "user", "content": prompt.format(logs=logs)},
-            ],
-        )
-        return response.choices[0].message.content.strip()
+        for chunk in stream:
+            search_start = max(0, len(buffer) - len(LOG_END_MARKER) + 1)
+            buffer += chunk
+            index = buffer.find(LOG_END_MARKER, search_start)
+            if index >= 0:
+                del buffer[index:]
+                break
+            if len(buffer) > 2 * LOG_BYTE_BUDGET:
+                del buffer[:-LOG_BYTE_BUDGET]
+    finally:
+        stream.close()
+    return bytes(buffer[-LOG_BYTE_BUDGET:])
+
+
+def _summarize_logs(logs: str) -> str:
+    response = _OPENAI_CLIENT.chat.completions.create(
+        model=WEAK_MODEL,
+        messages=[
+            _LOG_SUMMARY_SYSTEM_MESSAGE,
+            {"role": "user", "content": _LOG_SUMMARY_PROMPT.format(logs=logs)},
+        ],
+    )
+    return response.choices[0].message.content.strip()
+
+
+def _clean_logs(raw_logs: bytes) -> str:
+    logs = _scrub_logs(raw_logs).strip()
+    if len(logs) < LOG_SUMMARY_MIN_CHARS:
+        return logs
+
+    try:
+        return _summarize_logs(logs)
 
     except Exception as e:
-        logger.error(f"Failed to process logs with GPT-4: {e}")
+        logger.error("Failed to process logs with GPT-4: {}", e)
         return logs
 
 
+def _safe_stop(container) -> None:
+    try:
+        container.stop()
+    except Exception as e:
+        logger.warning("Failed to stop container {}: {}", container.name, e)
+
+
+def _safe_remove(container) -> None:
+    try:
+        container.remove()
+    except Exception as e:
+        logger.warning("Failed to remove container {}: {}", container.name, e)
+
+
+def _stop_and_remove(container) -> None:
+    _safe_stop(container)
+    _safe_remove(container)
+
+
+def _cleanup_containers(docker_client) -> None:
+    containers = docker_client.containers.list(all=True)
+    if not containers:
+        return
+    with ThreadPoolExecutor(max_workers=min(CLEANUP_MAX_WORKERS, len(containers))) as executor:
+        list(executor.map(_stop_and_remove, containers))
+
+
+def stop_running_containers() -> None:
+    """Stop the agent containers in flight so their waits return and clean up.
+
+    Containers launched afterwards are refused.
+    """
+    global _stopping
+    with _running_containers_lock:
+        _stopping = True
+        containers = list(_running_containers)
+    if not containers:
+        return
+    logger.info("Stopping {} running containers", len(containers))
+    with ThreadPoolExecutor(max_workers=min(CLEANUP_MAX_WORKERS, len(containers))) as executor:
+        list(executor.map(_safe_stop, containers))
+
+
 def launch_container_with_repo_mounted(
     timeout: int = 3600,
+    cleanup_all: bool = True,
     **kwargs,
 ) -> str:
+    if _stopping:
+        raise RuntimeError("Not launching a container while shutting down")
     docker_client = docker_from_env()
     logger.info("Launching container")
-    container = docker_client.containers.run(
-        **kwargs,
-        tty=True,
-        stdin_open=True,
-        detach=True,
-    )
+    container = docker_client.containers.run(**kwargs, detach=True)
     logger.info("Container launched")
 
     try:
-        logger.info(f"Waiting for container to finish (timeout: {timeout}s)")
-        result = container.wait(timeout=timeout)
-        logger.info(f"Container exited with status code: {result['StatusCode']}")
+        with _running_containers_lock:
+            # A stop may have swept the running containers while this one was starting.
+            if _stopping:
+                raise RuntimeError("Container launched while shutting down")
+            _running_containers.add(container)
 
-        raw_logs = container.logs(stream=False).decode("utf-8")
-        logger.info(f"Raw logs: {raw_logs}")
+        logger.info("Waiting for container to finish (timeout: {}s)", timeout)
+        result = container.wait(timeout=timeout)
+        logger.info("Container exited with status code: {}", result["StatusCode"])
 
         if result["StatusCode"] != 0:
+            raw_logs = container.logs(stream=False, tail=LOG_TAIL_LINES)
+            logger.info("Raw logs: {}", raw_logs.decode("utf-8", "replace"))
             raise Exception(f"Container exited with non-zero status code: {result['StatusCode']}")
 
+        raw_logs = _read_logs_until_marker(container)
+        logger.info("Raw logs: {}", raw_logs.decode("utf-8", "replace"))
         logs = _clean_logs(raw_logs)
-        logger.info(f"Clean logs: {logs}")
+        logger.info("Clean logs: {}", logs)
 
     except ReadTimeout:
-        logger.error(f"Container timed out after {timeout} seconds")
+        logger.error("Container timed out after {} seconds", timeout)
         raise TimeoutError(f"Container execution exceeded {timeout} seconds timeout")
 
     except Exception as e:
-        logger.error(f"Failed to wait for container: {e}")
+        logger.error("Failed to wait for container: {}", e)
         raise
 
     finally:
-        logger.info("Removing all containers")
-        for container in docker_client.containers.list(all=True):
-            container.stop()
-            container.remove()
-        logger.info("Containers removed")
+        with _running_containers_lock:
+            _running_containers.discard(container)
+        if cleanup_all:
+            logger.info("Removing all containers")
+            _cleanup_containers(docker_client)
+            logger.info("Containers removed")
+        else:
+            _stop_and_remove(container)
+            logger.info("Container removed")
 
     return logs
@@ -0,0 +1,28 @@
+"""Logging setup shared by the long running processes."""
+
+import atexit
+import sys
+
+from loguru import logger
+
+from src.config import SETTINGS
+
+LOG_FILE_BUFFER_SIZE = 64 * 1024
+
+
+def configure_logging() -> None:
+    """Route loguru records through a background queue.
+
+    Records are formatted and written by loguru's worker thread instead of the calling
+    thread. When LOG_FILE is set, records are also appended to that file through a
+    64 KiB buffer so that many records go out in a single write.
+    """
+    logger.remove()
+    logger.add(sys.stderr, enqueue=True, backtrace=False, diagnose=False)
+
+    if SETTINGS.log_file:
+        log_file = open(SETTINGS.log_file, "a", buffering=LOG_FILE_BUFFER_SIZE, encoding="utf-8")
+        atexit.register(log_file.close)
+        logger.add(log_file.write, enqueue=True, backtrace=False, diagnose=False)
+        # atexit handlers run in reverse order, so the queue is drained before the close.
+        atexit.register(logger.remove)
@@ -7,32 +7,39 @@ from src import utils
 from src.config import SETTINGS, Settings
 
 TIMEOUT = httpx.Timeout(10.0)
-
-
-async def _create_proposal_for_instance(instance: dict, settings: Settings) -> None:
+MAX_CONCURRENT_REQUESTS = 20
+LIMITS = httpx.Limits(
+    max_connections=MAX_CONCURRENT_REQUESTS, max_keepalive_connections=MAX_CONCURRENT_REQUESTS
+)
+
+
+async def _create_proposal_for_instance(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    instance: dict,
+    settings: Settings,
+) -> bool:
     instance_id = instance["id"]
     if not utils.find_github_repo_url(instance["background"]):
         logger.info("Instance id {} does not have a github repo url", instance_id)
-        return
+        return False
 
     logger.info("Creating proposal for instance id: {}", instance_id)
 
-    headers = {
-        "x-api-key": settings.market_api_key,
-        "Accept": "application/json",
-    }
     url = f"{settings.market_url}/v1/proposals/create/for-instance/{instance_id}"
     data = {
         "max_bid": settings.max_bid,
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=data)
+    async with semaphore:
+        response = await client.post(url, json=data)
 
     response.raise_for_status()
     logger.info(f"Proposal for instance id {instance_id} created successfully")
+    return True
 
 
-async def async_market_scan_handler() -> None:
+async def market_scan_handler() -> int:
+    """Create proposals for open instances and return how many were created."""
     headers = {
         "x-api-key": SETTINGS.market_api_key,
         "Accept": "application/json",
@@ -40,32 +47,28 @@ async def async_market_scan_handler() -> None:
     url = f"{SETTINGS.market_url}/v1/instances/"
     params = {"instance_status": SETTINGS.market_open_instance_code}
 
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        response = await client.get(url, headers=headers, params=params)
-
-    response.raise_for_status()
-    open_instances = response.json()
-
-    if not open_instances:
-        logger.debug("No open instances found")
-        return
-
-    logger.debug(f"Found {len(open_instances)} open instances")
-    url = f"{SETTINGS.market_url}/v1/proposals/"
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        response = await client.get(url, headers=headers)
-
-    response.raise_for_status()
-    proposals = response.json()
-
-    filled_instances = set(proposal["instance_id"] for proposal in proposals)
-    tasks = [
-        _create_proposal_for_instance(instance, SETTINGS)
-        for instance in open_instances
-        if instance["id"] not in filled_instances
-    ]
-    await asyncio.gather(*tasks)
-
-
-def market_scan_handler() -> None:
-    asyncio.run(async_market_scan_handler())
+    async with httpx.AsyncClient(headers=headers, timeout=TIMEOUT, limits=LIMITS) as client:
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        open_instances = response.json()
+
+        if not open_instances:
+            logger.debug("No open instances found")
+            return 0
+
+        logger.debug(f"Found {len(open_instances)} open instances")
+        url = f"{SETTINGS.market_url}/v1/proposals/"
+        response = await client.get(url)
+        response.raise_for_status()
+        proposals = response.json()
+
+        filled_instances = set(proposal["instance_id"] for proposal in proposals)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        tasks = [
+            _create_proposal_for_instance(client, semaphore, instance, SETTINGS)
+            for instance in open_instances
+            if instance["id"] not in filled_instances
+        ]
+        created = await asyncio.gather(*tasks)
+
+    return sum(created)
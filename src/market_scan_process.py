@@ -1,39 +1,78 @@
 """Market scan process that runs independently to check for new instances."""
 
-import sys
-import time
+import asyncio
+import signal
 
 from loguru import logger
 
+from src.log import configure_logging
 from src.market_scan import market_scan_handler
 
+SCAN_INTERVAL_SECONDS = 10
+MAX_SCAN_INTERVAL_SECONDS = 120
+STOP_EVENT = asyncio.Event()
+WAKE_EVENT = asyncio.Event()
 
-def main() -> None:
+
+def _request_stop(signum: int) -> None:
+    logger.info("Received signal {}, stopping market scan process", signum)
+    STOP_EVENT.set()
+    WAKE_EVENT.set()
+    # A second Ctrl+C falls back to KeyboardInterrupt.
+    asyncio.get_running_loop().remove_signal_handler(signal.SIGINT)
+
+
+def _request_scan() -> None:
+    logger.info("Market scan requested")
+    WAKE_EVENT.set()
+
+
+async def _wait_for_wake(timeout: float) -> None:
+    try:
+        await asyncio.wait_for(WAKE_EVENT.wait(), timeout=timeout)
+    except TimeoutError:
+        pass
+    finally:
+        WAKE_EVENT.clear()
+
+
+async def main() -> None:
     """
     Continuously run market scan as a standalone process.
 
-    The process runs every 10 seconds to check for new instances.
-    Handles graceful shutdown on keyboard interrupt.
+    The process scans every 10 seconds while proposals are being created and doubles
+    the wait, up to 120 seconds, while the market is idle. The wait between scans
+    returns as soon as a stop is requested, so SIGTERM and keyboard interrupts are
+    handled without finishing the current sleep. A second keyboard interrupt exits
+    immediately. SIGUSR1 starts a scan right away.
 
     Fixes #26: Decoupled from solve_instances to allow independent operation.
     """
+    configure_logging()
     logger.info("Starting market scan process...")
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, _request_stop, sig)
+    loop.add_signal_handler(signal.SIGUSR1, _request_scan)
 
-    try:
-        while True:
-            try:
-                logger.info("Starting market scan")
-                market_scan_handler()
-                logger.info("Market scan completed successfully")
-            except Exception as e:
-                logger.exception("Error during market scan: %s", str(e))
-            time.sleep(10)
-    except KeyboardInterrupt:
-        logger.info("Market scan process stopped by user")
-    except Exception as e:
-        logger.exception("Fatal error in market scan process: %s", str(e))
-        sys.exit(1)
+    interval = SCAN_INTERVAL_SECONDS
+    while not STOP_EVENT.is_set():
+        created = 0
+        try:
+            logger.info("Starting market scan")
+            created = await market_scan_handler()
+            logger.info("Market scan completed successfully")
+        except Exception as e:
+            logger.exception("Error during market scan: {}", e)
+
+        if created:
+            interval = SCAN_INTERVAL_SECONDS
+        else:
+            interval = min(interval * 2, MAX_SCAN_INTERVAL_SECONDS)
+        logger.debug("Next market scan in {} seconds", interval)
+        await _wait_for_wake(interval)
+    logger.info("Market scan process stopped")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,19 +1,35 @@
-import os
+import asyncio
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import httpx
 from loguru import logger
 
 from src import agents, utils
 from src.config import SETTINGS, Settings
-from src.containers import launch_container_with_repo_mounted
+from src.containers import launch_container_with_repo_mounted, stop_running_containers
 from src.enums import AgentType
 
 TIMEOUT = httpx.Timeout(10.0)
+LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+EMPTY_CHAT_CACHE_TTL_SECONDS = 60
+ETAG_CACHE_SIZE = 1024
+_MODIFY_REPO_PATH = Path(__file__).resolve().parent / "agents" / "aider_modify_repo.py"
+_MARKET_HEADERS = {"x-api-key": SETTINGS.market_api_key, "Accept": "application/json"}
+
+_market_client: httpx.AsyncClient | None = None
+# URL -> (ETag, parsed body) of the last successful GET that carried an ETag.
+_etag_cache: dict[str, tuple[str, Any]] = {}
+# Instance id -> monotonic time until which its chat is assumed to still be empty.
+_empty_chat_until: dict[str, float] = {}
+# Set once the process is shutting down; proposals not yet being solved are skipped.
+_stop_requested = False
 
 
 @dataclass
@@ -26,76 +42,155 @@ class InstanceToSolve:
     started_solving: bool = False
 
 
-def _get_instance_to_solve(instance_id: str, settings: Settings) -> Optional[InstanceToSolve]:
-    headers = {
-        "x-api-key": settings.market_api_key,
-    }
-    with httpx.Client(timeout=TIMEOUT) as client:
-        instance_endpoint = f"{settings.market_url}/v1/instances/{instance_id}"
-        response = client.get(instance_endpoint, headers=headers)
-        instance = response.json()
+def _get_market_client() -> httpx.AsyncClient:
+    """Return the pooled client shared by all market API calls of this process."""
+    global _market_client
+    if _market_client is None or _market_client.is_closed:
+        _market_client = httpx.AsyncClient(headers=_MARKET_HEADERS, timeout=TIMEOUT, limits=LIMITS)
+    return _market_client
+
+
+async def close_market_client() -> None:
+    if _market_client is not None:
+        await _market_client.aclose()
+
+
+def request_stop() -> None:
+    """Skip proposals that have not started solving and stop the running agents."""
+    global _stop_requested
+    _stop_requested = True
+    # Stopped containers make the solves' waits return and run their own cleanup. The
+    # default executor may be busy with those solves, so this gets a thread of its own.
+    threading.Thread(target=stop_running_containers, daemon=True).start()
+
+
+async def _get_json(url: str) -> tuple[httpx.Response, Any]:
+    """GET a market endpoint, revalidating the previous body with If-None-Match."""
+    cached = _etag_cache.get(url)
+    headers = {"If-None-Match": cached[0]} if cached else None
+    response = await _get_market_client().get(url, headers=headers)
+    if response.status_code == httpx.codes.NOT_MODIFIED and cached:
+        return response, cached[1]
+    if response.is_error:
+        return response, None
+
+    data = response.json()
+    etag = response.headers.get("ETag")
+    if etag:
+        _etag_cache.pop(url, None)
+        _etag_cache[url] = (etag, data)
+        if len(_etag_cache) > ETAG_CACHE_SIZE:
+            del _etag_cache[next(iter(_etag_cache))]
+    return response, data
+
+
+async def _get_instance_to_solve(instance_id: str, settings: Settings) -> Optional[InstanceToSolve]:
+    instance_endpoint = f"{settings.market_url}/v1/instances/{instance_id}"
+    chat_endpoint = f"{settings.market_url}/v1/chat/{instance_id}"
+    # The chat is requested speculatively alongside the instance and dropped if unused.
+    chat_request = None
+    if time.monotonic() >= _empty_chat_until.get(instance_id, 0):
+        chat_request = asyncio.create_task(_get_json(chat_endpoint))
+    try:
+        response, instance = await _get_json(instance_endpoint)
+        if response.is_error:
+            logger.error("Failed to fetch instance id {}: {}", instance_id, response.status_code)
+            return None
 
         if instance["status"] != settings.market_resolved_instance_code:
             return None
 
-    repo_url = utils.find_github_repo_url(instance["background"])
-    if not repo_url:
-        logger.info(f"Instance id {instance_id} does not have a github repo url")
-        return InstanceToSolve(instance=instance)
-
-    with httpx.Client(timeout=TIMEOUT) as client:
-        chat_endpoint = f"{settings.market_url}/v1/chat/{instance_id}"
-        response = client.get(chat_endpoint, headers=headers)
+        repo_url = utils.find_github_repo_url(instance["background"])
+        if not repo_url:
+            logger.info("Instance id {} does not have a github repo url", instance_id)
+            return InstanceToSolve(instance=instance)
 
-        chat = response.json()
-        if not chat:
+        if chat_request is None:
             return InstanceToSolve(instance=instance, repo_url=repo_url)
 
-        messages_from_provider_present = any(message["sender"] == "provider" for message in chat)
-        logger.info(
-            f"Instance id {instance_id} messages from provider: {messages_from_provider_present}"
-        )
-
-        messages_with_requester = (
-            utils.format_messages(chat)
-            if sorted(chat, key=lambda m: m["timestamp"])[-1]["sender"] == "requester"
-            else None
-        )
-        logger.info(f"Messages with requester: {messages_with_requester}")
+        response, chat = await chat_request
+    finally:
+        if chat_request is not None:
+            chat_request.cancel()
+            await asyncio.gather(chat_request, return_exceptions=True)
 
-        formatted_messages = utils.format_messages(chat)
-        pr_url = utils.get_pr_url(formatted_messages)
-        logger.info(
-            "PR URL {} found {} for instance id {}. Looking for PR comments".format(
-                "NOT" if not pr_url else "", pr_url if pr_url else "", instance_id
-            )
+    if response.is_error:
+        logger.error(
+            "Failed to fetch chat for instance id {}: {}", instance_id, response.status_code
         )
+        return None
+
+    if not chat:
+        now = time.monotonic()
+        # Drop expired entries so instances that are no longer awarded do not linger.
+        for expired_id in [i for i, until in _empty_chat_until.items() if until <= now]:
+            del _empty_chat_until[expired_id]
+        _empty_chat_until[instance_id] = now + EMPTY_CHAT_CACHE_TTL_SECONDS
+        return InstanceToSolve(instance=instance, repo_url=repo_url)
+
+    _empty_chat_until.pop(instance_id, None)
+
+    messages_from_provider_present = False
+    latest_message = chat[0]
+    for message in chat:
+        if message["sender"] == "provider":
+            messages_from_provider_present = True
+        if message["timestamp"] >= latest_message["timestamp"]:
+            latest_message = message
+    logger.info(
+        "Instance id {} messages from provider: {}", instance_id, messages_from_provider_present
+    )
 
-        if not pr_url:
-            return InstanceToSolve(
-                instance=instance,
-                repo_url=repo_url,
-                messages_with_requester=messages_with_requester,
-                started_solving=messages_from_provider_present,
-            )
+    formatted_messages = utils.format_messages(chat)
+    messages_with_requester = (
+        formatted_messages if latest_message["sender"] == "requester" else None
+    )
+    logger.info("Messages with requester: {}", messages_with_requester)
+
+    pr_url = utils.get_pr_url(formatted_messages)
+    logger.info(
+        "PR URL {} found {} for instance id {}. Looking for PR comments",
+        "NOT" if not pr_url else "",
+        pr_url if pr_url else "",
+        instance_id,
+    )
 
-        logger.info(f"Looking for PR comments in chat with instance id {instance_id}")
-        pr_comments = utils.get_last_pr_comments(pr_url, settings.github_pat)
-        pr_comments = pr_comments if pr_comments else None
-        logger.info(
-            "PR comments {} found {} for instance id {}".format(
-                "NOT" if not pr_comments else "", pr_comments if pr_comments else "", instance_id
-            )
-        )
+    if not pr_url:
         return InstanceToSolve(
             instance=instance,
             repo_url=repo_url,
-            pr_url=pr_url,
-            pr_comments=pr_comments,
             messages_with_requester=messages_with_requester,
             started_solving=messages_from_provider_present,
         )
 
+    logger.info("Looking for PR comments in chat with instance id {}", instance_id)
+    pr_comments = await asyncio.to_thread(utils.get_last_pr_comments, pr_url, settings.github_pat)
+    pr_comments = pr_comments if pr_comments else None
+    logger.info(
+        "PR comments {} found {} for instance id {}",
+        "NOT" if not pr_comments else "",
+        pr_comments if pr_comments else "",
+        instance_id,
+    )
+    return InstanceToSolve(
+        instance=instance,
+        repo_url=repo_url,
+        pr_url=pr_url,
+        pr_comments=pr_comments,
+        messages_with_requester=messages_with_requester,
+        started_solving=messages_from_provider_present,
+    )
+
+
+def _create_scratch_directory(settings: Settings) -> tempfile.TemporaryDirectory:
+    if settings.scratch_dir is None:
+        return tempfile.TemporaryDirectory()
+    try:
+        return tempfile.TemporaryDirectory(dir=settings.scratch_dir)
+    except OSError as e:
+        logger.warning("Cannot use scratch directory {}: {}", settings.scratch_dir, e)
+        return tempfile.TemporaryDirectory()
+
 
 def _solve_instance(
     instance_to_solve: InstanceToSolve,
@@ -110,13 +205,23 @@ def _solve_instance(
     solver_command = utils.remove_all_urls(solver_command)
 
     forked_repo_url = utils.fork_repo(instance_to_solve.repo_url, settings.github_pat)
-    logger.info(f"Forked repo url: {forked_repo_url}")
+    logger.info("Forked repo url: {}", forked_repo_url)
     forked_repo_name = utils.extract_repo_name_from_url(forked_repo_url)
-    with tempfile.TemporaryDirectory() as temp_dir:
+    with _create_scratch_directory(settings) as temp_dir:
         repo_absolute_path = Path(temp_dir)
-        logger.info(f"Cloning repository {forked_repo_url} to {repo_absolute_path}")
+        logger.info("Cloning repository {} to {}", forked_repo_url, repo_absolute_path)
 
-        utils.clone_repository(forked_repo_url, str(repo_absolute_path), settings.github_pat)
+        try:
+            utils.clone_repository(
+                forked_repo_url,
+                str(repo_absolute_path),
+                settings.github_pat,
+                clone_filter=settings.git_clone_filter,
+            )
+        except Exception:
+            # The cached fork may have been deleted; look it up again next time.
+            utils.fork_repo.cache_clear()
+            raise
         utils.create_and_push_branch(
             repo_absolute_path, instance_to_solve.instance["id"], settings.github_pat
         )
@@ -130,11 +235,10 @@ def _solve_instance(
             )
         elif settings.agent_type == AgentType.aider:
             logger.info("Aider agent type")
-            modify_repo_absolute_path = (
-                Path(os.path.dirname(os.path.abspath(__file__))) / "agents" / "aider_modify_repo.py"
+            utils.copy_file_to_directory(_MODIFY_REPO_PATH, repo_absolute_path)
+            utils.change_directory_ownership_recursive(
+                repo_absolute_path, agents.CONTAINER_UID, agents.CONTAINER_GID
             )
-            utils.copy_file_to_directory(modify_repo_absolute_path, repo_absolute_path)
-            utils.change_directory_ownership_recursive(repo_absolute_path, os.getuid(), os.getgid())
 
             test_command = agents.aider_suggest_test_command(str(repo_absolute_path))
             container_kwargs = agents.aider_get_container_kwargs(
@@ -145,14 +249,19 @@ def _solve_instance(
                 settings.architect_model_name.value,
             )
         elif settings.agent_type == AgentType.raaid:
-            utils.change_directory_ownership_recursive(repo_absolute_path, os.getuid(), os.getgid())
+            utils.change_directory_ownership_recursive(
+                repo_absolute_path, agents.CONTAINER_UID, agents.CONTAINER_GID
+            )
             container_kwargs = agents.raaid_get_container_kwargs(
                 str(repo_absolute_path),
                 solver_command,
                 settings.foundation_model_name,
             )
 
-        logs = launch_container_with_repo_mounted(**container_kwargs)
+        # OpenHands starts sandbox containers of its own, so everything is swept afterwards.
+        logs = launch_container_with_repo_mounted(
+            cleanup_all=settings.agent_type == AgentType.open_hands, **container_kwargs
+        )
         if instance_to_solve.pr_url:
             utils.add_logs_as_pr_comments(instance_to_solve.pr_url, settings.github_pat, logs)
 
@@ -163,12 +272,18 @@ def _solve_instance(
                 return "Added comments to PR"
             target_repo_name = utils.extract_repo_name_from_url(instance_to_solve.repo_url)
             logger.info(
-                f"Creating pull request from source repo {forked_repo_name} "
-                f"to target repo {target_repo_name}"
+                "Creating pull request from source repo {} to target repo {}",
+                forked_repo_name,
+                target_repo_name,
             )
 
-            pr_title = utils.get_pr_title(instance_to_solve.instance["background"])
-            pr_body = utils.get_pr_body(instance_to_solve.instance["background"], logs)
+            # Title and body are independent model calls, so they are generated together.
+            background = instance_to_solve.instance["background"]
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                pr_title_future = executor.submit(utils.get_pr_title, background)
+                pr_body_future = executor.submit(utils.get_pr_body, background, logs)
+                pr_title = pr_title_future.result()
+                pr_body = pr_body_future.result()
 
             pr_url = utils.create_pull_request(
                 source_repo_name=forked_repo_name,
@@ -182,81 +297,109 @@ def _solve_instance(
             return f"Solved instance {instance_to_solve.instance['id']} with PR {pr_url}"
         else:
             logger.info(
-                f"No new commits to push for instance id {instance_to_solve.instance['id']}"
+                "No new commits to push for instance id {}", instance_to_solve.instance["id"]
             )
             return logs
 
 
-def get_awarded_proposals(settings: Settings) -> list[dict]:
-    headers = {
-        "x-api-key": settings.market_api_key,
-    }
-    url = f"{settings.market_url}/v1/proposals/"
+async def _get_all_proposals(settings: Settings) -> list[dict]:
+    """Fetch the provider's proposals, reusing the previous response if unchanged."""
+    response, proposals = await _get_json(f"{settings.market_url}/v1/proposals/")
+    if response.is_error:
+        response.raise_for_status()
+    return proposals
 
-    response = httpx.get(url, headers=headers)
-    response.raise_for_status()
-    all_proposals = response.json()
 
-    current_time = datetime.utcnow()
-    one_day_ago = current_time - timedelta(days=1)
+async def get_awarded_proposals(settings: Settings) -> list[dict]:
+    all_proposals = await _get_all_proposals(settings)
+
+    # Creation dates are naive UTC ISO-8601 strings, so the seconds-precision prefix,
+    # with a space separator normalized to "T", orders lexicographically and no
+    # per-proposal parsing is needed.
+    one_day_ago = (datetime.utcnow() - timedelta(days=1)).isoformat(timespec="seconds")
 
     awarded_proposals = [
         p
         for p in all_proposals
-        if p["status"] == settings.market_awarded_proposal_code
-        and datetime.fromisoformat(p["creation_date"]) > one_day_ago
+        if p.get("status") == settings.market_awarded_proposal_code
+        and p.get("instance_id")
+        and (p.get("creation_date") or "")[:19].replace(" ", "T", 1) > one_day_ago
     ]
     return awarded_proposals
 
 
-def _send_message(instance_id: str, message: str, settings: Settings) -> None:
-    headers = {
-        "x-api-key": settings.market_api_key,
-    }
+async def _send_message(instance_id: str, message: str, settings: Settings) -> None:
     url = f"{settings.market_url}/v1/chat/send-message/{instance_id}"
     data = {"message": message}
 
-    response = httpx.post(url, headers=headers, json=data)
+    _empty_chat_until.pop(instance_id, None)
+    response = await _get_market_client().post(url, json=data)
     response.raise_for_status()
 
 
-def solve_instances_handler() -> None:
+async def _process_proposal(proposal: dict, semaphore: asyncio.Semaphore) -> bool:
+    """Solve the proposal's instance if it needs work and return whether it was attempted."""
+    attempted = False
+    try:
+        instance_to_solve = await _get_instance_to_solve(proposal["instance_id"], SETTINGS)
+        if not instance_to_solve or not instance_to_solve.repo_url:
+            return attempted
+
+        pr_interaction = bool(instance_to_solve.pr_url) and bool(instance_to_solve.pr_comments)
+        user_interaction = bool(instance_to_solve.messages_with_requester)
+        if instance_to_solve.started_solving and (not pr_interaction) and (not user_interaction):
+            return attempted
+
+        async with semaphore:
+            if _stop_requested:
+                return attempted
+            attempted = True
+            message = await asyncio.to_thread(
+                _solve_instance,
+                instance_to_solve,
+                SETTINGS,
+            )
+        if not message:
+            return attempted
+    except Exception as e:
+        logger.error("Error solving instance id {}: {}", proposal["instance_id"], e)
+        return attempted
+
+    try:
+        await _send_message(
+            instance_to_solve.instance["id"],
+            message,
+            SETTINGS,
+        )
+    except Exception as e:
+        logger.error(
+            "Error sending message for instance id {}: {}", instance_to_solve.instance["id"], e
+        )
+    return attempted
+
+
+async def solve_instances_handler() -> int:
+    """Solve awarded instances that need work and return how many were attempted."""
     logger.info("Solve instances handler")
-    awarded_proposals = get_awarded_proposals(SETTINGS)
+    awarded_proposals = await get_awarded_proposals(SETTINGS)
 
-    logger.info(f"Found {len(awarded_proposals)} awarded proposals")
+    logger.info("Found {} awarded proposals", len(awarded_proposals))
 
+    # Several proposals can point at one instance; solving it twice would race on its branch.
+    proposals_by_instance: dict[str, dict] = {}
     for p in awarded_proposals:
-        try:
-            instance_to_solve = _get_instance_to_solve(p["instance_id"], SETTINGS)
-            if not instance_to_solve or not instance_to_solve.repo_url:
-                continue
-
-            pr_interaction = bool(instance_to_solve.pr_url) and bool(instance_to_solve.pr_comments)
-            user_interaction = bool(instance_to_solve.messages_with_requester)
-            if (
-                instance_to_solve.started_solving
-                and (not pr_interaction)
-                and (not user_interaction)
-            ):
-                continue
-
-            message = _solve_instance(
-                instance_to_solve,
-                SETTINGS,
-            )
-            if not message:
-                continue
-        except Exception as e:
-            logger.error(f"Error solving instance id {instance_to_solve.instance['id']}: {e}")
-        else:
-            try:
-                _send_message(
-                    instance_to_solve.instance["id"],
-                    message,
-                    SETTINGS,
-                )
-            except Exception as e:
-                logger.error(
-                    f"Error sending message for instance id {instance_to_solve.instance['id']}: {e}"
-                )
+        proposals_by_instance.setdefault(p["instance_id"], p)
+    if len(proposals_by_instance) < len(awarded_proposals):
+        logger.info(
+            "Skipping {} duplicate proposals", len(awarded_proposals) - len(proposals_by_instance)
+        )
+
+    # OpenHands runs sweep every container when they finish, so they cannot overlap.
+    max_concurrent_solves = (
+        1 if SETTINGS.agent_type == AgentType.open_hands else SETTINGS.max_concurrent_solves
+    )
+    semaphore = asyncio.Semaphore(max_concurrent_solves)
+    attempted = await asyncio.gather(
+        *(_process_proposal(p, semaphore) for p in proposals_by_instance.values())
+    )
+    return sum(attempted)
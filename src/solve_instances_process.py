@@ -1,47 +1,91 @@
 """Process that continuously solves awarded instances independently."""
 
 import asyncio
-import sys
+import signal
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from loguru import logger
 
 from src.config import SETTINGS
-from src.solve_instances import solve_instances_handler
+from src.log import configure_logging
+from src.solve_instances import close_market_client, request_stop, solve_instances_handler
 from src.utils.git import accept_repo_invitations
 
+SOLVE_INTERVAL_SECONDS = 30
+MAX_SOLVE_INTERVAL_SECONDS = 300
+INVITATIONS_INTERVAL_SECONDS = 300
+STOP_EVENT = asyncio.Event()
+
+
+def _request_stop(signum: int) -> None:
+    logger.info("Received signal {}, stopping solve instances process", signum)
+    STOP_EVENT.set()
+    # A second Ctrl+C falls back to KeyboardInterrupt.
+    asyncio.get_running_loop().remove_signal_handler(signal.SIGINT)
+    request_stop()
+
+
+async def _wait_for_stop(timeout: float) -> None:
+    try:
+        await asyncio.wait_for(STOP_EVENT.wait(), timeout=timeout)
+    except TimeoutError:
+        pass
+
 
 async def main():
     """
     Continuously run solve instances as a standalone process.
 
-    The process runs every 30 seconds to process awarded proposals.
-    Handles graceful shutdown on keyboard interrupt.
+    The process runs every 30 seconds while instances are being solved and doubles
+    the wait, up to 300 seconds, while there is nothing to do. Invitations to private
+    repos are accepted about every 5 minutes, however long the waits get. The wait
+    between runs returns as soon as a stop is requested, so SIGTERM and keyboard
+    interrupts are handled without finishing the current sleep. On a stop, running
+    agent containers are stopped and no new solves or containers are started. A second
+    keyboard interrupt cancels the remaining async work, though the process still waits
+    for solver threads that are already running to return.
+
+    Blocking solver work runs in the loop's default executor.
 
     Fixes #26: Decoupled from market_scan to allow independent operation.
     """
+    configure_logging()
     logger.info("Starting solve instances process...")
+    loop = asyncio.get_running_loop()
+    # Solves hold a thread for their whole run, so a few are kept free for the shorter
+    # blocking calls of the other proposals.
+    max_workers = max(SETTINGS.thread_pool_size, SETTINGS.max_concurrent_solves + 2)
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max_workers))
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, _request_stop, sig)
 
     try:
-        counter = 0
-        while True:
+        next_invitations_at = 0.0
+        interval = SOLVE_INTERVAL_SECONDS
+        while not STOP_EVENT.is_set():
+            attempted = 0
             try:
                 logger.info("Starting solve instances")
-                solve_instances_handler()
+                attempted = await solve_instances_handler()
                 logger.info("Solve instances completed successfully")
-                if counter == 1:
+                if not STOP_EVENT.is_set() and time.monotonic() >= next_invitations_at:
+                    next_invitations_at = time.monotonic() + INVITATIONS_INTERVAL_SECONDS
                     logger.info("Accepting invitations to private repos")
                     await accept_repo_invitations(SETTINGS.github_pat)
                     logger.info("Finished accepting invitations to private repos")
             except Exception as e:
-                logger.exception("Error during solve instances: %s", str(e))
-            time.sleep(30)
-            counter = (counter + 1) % 10
-    except KeyboardInterrupt:
-        logger.info("Solve instances process stopped by user")
-    except Exception as e:
-        logger.exception("Fatal error in solve instances process: %s", str(e))
-        sys.exit(1)
+                logger.exception("Error during solve instances: {}", e)
+
+            if attempted:
+                interval = SOLVE_INTERVAL_SECONDS
+            else:
+                interval = min(interval * 2, MAX_SOLVE_INTERVAL_SECONDS)
+            logger.debug("Next solve instances run in {} seconds", interval)
+            await _wait_for_stop(interval)
+        logger.info("Solve instances process stopped")
+    finally:
+        await close_market_client()
 
 
 if __name__ == "__main__":
@@ -7,6 +7,8 @@ from src.config import SETTINGS
 
 openai.api_key = SETTINGS.openai_api_key
 WEAK_MODEL = "gpt-4o-mini"
+URL_RE = re.compile(r"https?:\/\/[^\s]+")
+ISSUE_NUMBER_RE = re.compile(r"Issue Number: (\d+)")
 
 
 def get_pr_title(background: str) -> str:
@@ -33,7 +35,7 @@ def get_pr_title(background: str) -> str:
 
 
 def get_pr_body(background: str, logs: str) -> str:
-    match = re.search(r"Issue Number: (\d+)", background)
+    match = ISSUE_NUMBER_RE.search(background)
     issue_number = match.group(1) if match else None
 
     response = openai.chat.completions.create(
@@ -68,7 +70,7 @@ def get_pr_body(background: str, logs: str) -> str:
 def remove_all_urls(text: str) -> str:
     text = text.replace("Repository URL:", "")
     text = text.replace("Issue URL:", "")
-    return re.sub(r"https?:\/\/[^\s]+", "", text)
+    return URL_RE.sub("", text)
 
 
 def format_messages(messages: list[dict]) -> str:
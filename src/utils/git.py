@@ -1,3 +1,4 @@
+import functools
 import os
 import re
 import shutil
@@ -12,16 +13,22 @@ from loguru import logger
 
 from .commit_message import generate_commit_message
 
+GITHUB_URL_RE = re.compile(r"https://github.com/[^\s]+")
+PR_URL_RE = re.compile(r"https://github\.com/[^/]+/[^/]+/pull/\d+")
+# Abort clones that stay below 1 KB/s for a minute instead of hanging on a stuck connection.
+GIT_LOW_SPEED_ENV = {"GIT_HTTP_LOW_SPEED_LIMIT": "1000", "GIT_HTTP_LOW_SPEED_TIME": "60"}
+
 
 def find_github_repo_url(text: str) -> Optional[str]:
-    pattern = r"https://github.com/[^\s]+"
-    match = re.search(pattern, text)
+    match = GITHUB_URL_RE.search(text)
     if match:
         return match.group(0)
     return None
 
 
-def clone_repository(repo_url: str, target_dir: str, github_token: str = None) -> None:
+def clone_repository(
+    repo_url: str, target_dir: str, github_token: str = None, clone_filter: str = None
+) -> None:
     if os.path.exists(target_dir):
         shutil.rmtree(target_dir)
 
@@ -32,10 +39,13 @@ def clone_repository(repo_url: str, target_dir: str, github_token: str = None) -
     else:
         auth_url = repo_url
 
-    git.Repo.clone_from(auth_url, target_dir)
+    # A filter such as "blob:none" makes a partial clone: full history, contents on demand.
+    clone_options = {"filter": clone_filter} if clone_filter else {}
+    git.Repo.clone_from(auth_url, target_dir, env=GIT_LOW_SPEED_ENV, **clone_options)
     logger.info(f"Cloned repository from {repo_url} to {target_dir}")
 
 
+@functools.lru_cache(maxsize=256)
 def fork_repo(github_url: str, github_token: str) -> str:
     g = github.Github(github_token)
     repo_path = github_url.replace("https://github.com/", "").removesuffix(".git")
@@ -619,8 +629,7 @@ def add_logs_as_pr_comments(pr_url: str, github_token: str, logs: str) -> None:
 
 
 def get_pr_url(chat_text: str) -> Optional[str]:
-    pr_url_pattern = r"https://github\.com/[^/]+/[^/]+/pull/\d+"
-    match = re.search(pr_url_pattern, chat_text)
+    match = PR_URL_RE.search(chat_text)
     if match:
         return match.group(0)
     return None